@@ -8,47 +8,52 @@ Provides functionality for:
 """
 
 import logging
+import mmap
 import os
+import struct
+import sys
 from datetime import datetime
-from typing import Union, Generator
+from typing import List, Optional, Tuple, Generator
 
 import piexif
-from PIL import Image
-from PIL.ExifTags import TAGS
-from PIL.ImageFile import ImageFile
+
+_TAG_DATETIME = piexif.ImageIFD.DateTime
+_TAG_EXIF_IFD = piexif.ImageIFD.ExifTag
+_TAG_DATETIME_ORIGINAL = piexif.ExifIFD.DateTimeOriginal
+_TAG_DATETIME_DIGITIZED = piexif.ExifIFD.DateTimeDigitized
+_TAG_NAMES = {tag_id: info["name"] for tag_id, info in piexif.TAGS["0th"].items()}
 
 
 class EXIFHandler:
     """Handles EXIF operations for image files."""
 
-    _VALID_HOURS = (
-        "00", "01", "02", "03", "04", "05", "06", "07", "08", "09",
-        "10", "11", "12", "13", "14", "15", "16", "17", "18", "19",
-        "20", "21", "22", "23"
-    )
+    _IMAGE_EXTENSIONS = (".jpg", ".jpeg")
+    _DATETIME_FORMAT = "%Y:%m:%d %H:%M:%S"
+    _DATETIME_SIZE = 20  # "YYYY:MM:DD HH:MM:SS" plus NUL terminator
+    _BYTE_ORDERS = {b"II": "<", b"MM": ">"}
 
     def __init__(self, default_date: datetime = datetime(9999, 1, 1)):
         self.default_date = default_date
 
-    @classmethod
-    def print_metadata(cls, image: Union[ImageFile, str]) -> None:
+    @staticmethod
+    def print_metadata(file_path: str) -> None:
         """Print all EXIF metadata for an image.
 
         Args:
-            image (Union[ImageFile, str]): Image object or file path
+            file_path (str): Path to image file
         """
-        img = cls._open_image(image)
-        try:
-            exif_data = img.getexif()
-            for tag_id, value in exif_data.items():
-                tag_name = TAGS.get(tag_id, tag_id)
-                print(f"{tag_name:25}: {value}")
-        finally:
-            if isinstance(image, str):
-                img.close()
+        exif_data = piexif.load(file_path)["0th"]
+        tag_name_of = _TAG_NAMES.get
+        lines = []
+        for tag_id, value in exif_data.items():
+            tag_name = tag_name_of(tag_id, tag_id)
+            if isinstance(value, bytes):
+                value = value.decode("ascii", errors="replace")
+            lines.append(f"{tag_name:25}: {value}\n")
+        sys.stdout.write("".join(lines))
 
-    @staticmethod
-    def find_images(directory: str) -> Generator[str, None, None]:
+    @classmethod
+    def find_images(cls, directory: str) -> Generator[str, None, None]:
         """Find JPG/JPEG files recursively in a directory.
 
         Args:
@@ -57,16 +62,43 @@ class EXIFHandler:
         Yields:
             str: Full path to found image files
         """
-        for root, _, files in os.walk(directory):
-            for filename in files:
-                if filename.lower().endswith((".jpg", ".jpeg")):
-                    yield os.path.join(root, filename)
+        for entry in cls.scan_images(directory):
+            yield entry.path
+
+    @classmethod
+    def scan_images(cls, directory: str) -> Generator[os.DirEntry, None, None]:
+        """Find JPG/JPEG files recursively, keeping the scandir entries.
+
+        Walks with os.scandir and an explicit stack of pending directories,
+        checking the extension before touching the entry type. Entries of one
+        directory are yielded together, and their inode and stat data are
+        cached by scandir.
+
+        Args:
+            directory (str): Path to search for images
 
-    def get_image_date(self, image: Union[ImageFile, str]) -> datetime:
+        Yields:
+            os.DirEntry: Entry of each found image file
+        """
+        extensions = cls._IMAGE_EXTENSIONS
+        pending = [directory]
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+            except OSError:
+                continue  # Unreadable directories are skipped, as os.walk does
+            with entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(extensions) and not entry.is_dir():
+                        yield entry
+                    elif entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+
+    def get_image_date(self, file_path: str) -> datetime:
         """Extract and validate creation date from EXIF data.
 
         Args:
-            image (Union[ImageFile, str]): Image object or file path
+            file_path (str): Path to image file
 
         Returns:
             datetime: Validated creation date, otherwise if not found EXIF returns self.default_date
@@ -74,76 +106,324 @@ class EXIFHandler:
         Raises:
             ValueError: If date format is invalid
         """
-        img = self._open_image(image)
-        try:
-            exif_data = img.getexif()
-            date_str = exif_data.get(piexif.ImageIFD.DateTime)
-            # TODO: also check for DateTimeOriginal and DateTimeDigitized
+        return self.read_image_date(file_path)[0]
+
+    def read_image_date(self, file_path: str) -> Tuple[datetime, Optional[dict]]:
+        """Extract creation date from a file, keeping any EXIF data loaded on the way.
+
+        Args:
+            file_path (str): Path to image file
+
+        Returns:
+            Tuple[datetime, Optional[dict]]: Validated creation date and the loaded EXIF
+            dict, or None if the date was read by the fast header scan
 
-            if not date_str:
-                logging.warning(f"No EXIF date found for {image if isinstance(image, str) else 'image'}")
-                return self.default_date
+        Raises:
+            ValueError: If date format is invalid
+        """
+        date_bytes, exif_dict = self._read_raw_date(file_path)
+        date_str = date_bytes.decode("ascii", errors="replace") if date_bytes else None
+        return self._validate_date(date_str, file_path), exif_dict
+
+    def read_date_bytes(self, file_path: str) -> Tuple[bytes, Optional[dict]]:
+        """Extract creation date as an EXIF date value that compares correctly byte-wise.
 
-            date_str = self._fix_invalid_hours(date_str, image)
-            return self._parse_datetime(date_str, image)
-        finally:
-            if isinstance(image, str):
-                img.close()
+        Well-formed values are returned as stored. Anything else goes through the
+        same validation as read_image_date and is re-encoded.
+
+        Args:
+            file_path (str): Path to image file
+
+        Returns:
+            Tuple[bytes, Optional[dict]]: Date in encode_date format and the loaded EXIF
+            dict, or None if the date was read by the fast header scan
+
+        Raises:
+            ValueError: If date format is invalid
+        """
+        date_bytes, exif_dict = self._read_raw_date(file_path)
+        if date_bytes and self._is_canonical_date(date_bytes):
+            return date_bytes, exif_dict
+        date_str = date_bytes.decode("ascii", errors="replace") if date_bytes else None
+        return self.encode_date(self._validate_date(date_str, file_path)), exif_dict
 
-    def update_exif_date(self, file_path: str, new_date: datetime) -> None:
+    def update_exif_date(self, file_path: str, new_date: datetime, exif_dict: Optional[dict] = None) -> None:
         """Update EXIF datetime tags in an image file.
 
         Args:
             file_path (str): Path to image file
             new_date (datetime): New datetime to set
+            exif_dict (Optional[dict]): Already loaded EXIF data, loaded from file if omitted
+
+        Raises:
+            RuntimeError: If EXIF update fails
+        """
+        self.update_exif_date_bytes(file_path, self.encode_date(new_date), exif_dict)
+
+    def update_exif_date_bytes(self, file_path: str, date_bytes: bytes, exif_dict: Optional[dict] = None) -> None:
+        """Update EXIF datetime tags with an already encoded date.
+
+        Args:
+            file_path (str): Path to image file
+            date_bytes (bytes): New date as returned by encode_date
+            exif_dict (Optional[dict]): Already loaded EXIF data, loaded from file if omitted
 
         Raises:
             RuntimeError: If EXIF update fails
         """
         try:
-            exif_dict = self._load_exif_data(file_path)
-            date_bytes = new_date.strftime("%Y:%m:%d %H:%M:%S").encode('utf-8')
+            # Existing date tags are patched in place, only missing ones need a rewrite
+            offsets = None
+            if len(date_bytes) == self._DATETIME_SIZE - 1:
+                offsets = self._find_date_offsets(file_path)
+            if offsets:
+                self._patch_exif_dates(file_path, offsets, date_bytes)
+            else:
+                if exif_dict is None:
+                    exif_dict = self._load_exif_data(file_path)
 
-            exif_dict["Exif"][piexif.ExifIFD.DateTimeOriginal] = date_bytes
-            exif_dict["Exif"][piexif.ExifIFD.DateTimeDigitized] = date_bytes
-            exif_dict["0th"][piexif.ImageIFD.DateTime] = date_bytes
+                exif_dict["Exif"][_TAG_DATETIME_ORIGINAL] = date_bytes
+                exif_dict["Exif"][_TAG_DATETIME_DIGITIZED] = date_bytes
+                exif_dict["0th"][_TAG_DATETIME] = date_bytes
 
-            self._save_exif_data(file_path, exif_dict)
+                self._save_exif_data(file_path, exif_dict)
             logging.info(f"Updated EXIF date for {file_path}")
         except Exception as e:
             raise RuntimeError(f"Failed to update {file_path}") from e
 
-    @classmethod
-    def _fix_invalid_hours(cls, date_str: str, image: Union[ImageFile, str]) -> str:
+    def _read_raw_date(self, file_path: str) -> Tuple[Optional[bytes], Optional[dict]]:
+        """Read the raw DateTime value, loading EXIF data only if the fast scan misses."""
+        exif_dict = None
+        date_bytes = self._read_datetime_fast(file_path)
+        if date_bytes is None:
+            exif_dict = self._load_exif_data(file_path)
+            date_bytes = exif_dict["0th"].get(_TAG_DATETIME)
+        return date_bytes, exif_dict
+
+    @staticmethod
+    def _is_canonical_date(date_bytes: bytes) -> bool:
+        """Check for a "YYYY:MM:DD HH:MM:SS" value that is a real date without parsing it.
+
+        Days past the 28th are left to _parse_datetime, which knows the month lengths.
+        """
+        return (len(date_bytes) == 19 and date_bytes[10:11] == b" "
+                and date_bytes[4:5] == date_bytes[7:8] == date_bytes[13:14] == date_bytes[16:17] == b":"
+                and date_bytes[0:4].isdigit() and date_bytes[5:7].isdigit() and date_bytes[8:10].isdigit()
+                and date_bytes[11:13].isdigit() and date_bytes[14:16].isdigit() and date_bytes[17:19].isdigit()
+                and date_bytes[0:4] > b"0000"
+                and b"01" <= date_bytes[5:7] <= b"12" and b"01" <= date_bytes[8:10] <= b"28"
+                and date_bytes[11:13] < b"24" and date_bytes[14:16] < b"60" and date_bytes[17:19] < b"60")
+
+    @staticmethod
+    def encode_date(date: datetime) -> bytes:
+        """Format a datetime as a fixed-width EXIF date value.
+
+        Fields are padded explicitly, since strftime("%Y") does not zero-pad years
+        below 1000 and the values must compare correctly byte-wise.
+        """
+        return (f"{date.year:04d}:{date.month:02d}:{date.day:02d} "
+                f"{date.hour:02d}:{date.minute:02d}:{date.second:02d}").encode('ascii')
+
+    def _validate_date(self, date_str: Optional[str], file_path: str) -> datetime:
+        """Turn a raw EXIF date string into a datetime, falling back to self.default_date."""
+        # TODO: also check for DateTimeOriginal and DateTimeDigitized
+        if not date_str:
+            logging.warning(f"No EXIF date found for {file_path}")
+            return self.default_date
+
+        date_str = self._fix_invalid_hours(date_str, file_path)
+        return self._parse_datetime(date_str, file_path)
+
+    @staticmethod
+    def _fix_invalid_hours(date_str: str, file_path: str) -> str:
         """Fix invalid 24-hour format dates."""
-        if date_str[11:13] not in cls._VALID_HOURS:
-            logging.warning(f"Invalid hour in {date_str} for {image}, correcting to 00")
+        hour = date_str[11:13]
+        if not (len(hour) == 2 and hour.isascii() and hour.isdigit() and int(hour) < 24):
+            logging.warning(f"Invalid hour in {date_str} for {file_path}, correcting to 00")
             return f"{date_str[:11]}00{date_str[13:]}"
         return date_str
 
+    @classmethod
+    def _read_datetime_fast(cls, file_path: str) -> Optional[bytes]:
+        """Read the raw DateTime tag straight from the APP1 segment.
+
+        Memory-maps the file and walks only the 0th IFD, skipping piexif's
+        full parse on the hot path. Anything short of a single ASCII DateTime
+        entry is left for piexif to decide.
+
+        Returns:
+            Optional[bytes]: DateTime value as piexif would read it, or None if
+            it was not found and piexif should be used
+        """
+        try:
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header = cls._find_tiff_header(mm)
+                if header is None:
+                    return None
+
+                tiff, endian, segment_end = header
+                date_bytes = None
+                # Writers do not always sort IFD entries, so the whole IFD is scanned
+                for entry, tag, value_type, count, value_offset in cls._ifd_entries(mm, tiff, endian, segment_end):
+                    if tag != _TAG_DATETIME:
+                        continue
+                    if value_type != 2 or count < 2 or date_bytes is not None:
+                        return None
+
+                    start = entry + 8 if count <= 4 else tiff + value_offset
+                    if start + count > segment_end:
+                        return None
+                    date_bytes = mm[start:start + count - 1]  # Drop the NUL terminator like piexif
+                return date_bytes
+        except (OSError, ValueError, struct.error):
+            return None
+
+    @classmethod
+    def _find_date_offsets(cls, file_path: str) -> Optional[List[int]]:
+        """Locate the file offsets of the DateTime, DateTimeOriginal and DateTimeDigitized values.
+
+        Returns:
+            Optional[List[int]]: Absolute offsets of the three values, or None unless
+            all of them exist as ASCII dates inside the APP1 segment that can be
+            overwritten in place
+        """
+        offsets = {}
+        try:
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header = cls._find_tiff_header(mm)
+                if header is None:
+                    return None
+
+                tiff, endian, segment_end = header
+                ifd0 = list(cls._ifd_entries(mm, tiff, endian, segment_end))
+                exif_ifd = next((entry[4] for entry in ifd0 if entry[1] == _TAG_EXIF_IFD), None)
+                if exif_ifd is None:
+                    return None
+
+                date_entries = [entry for entry in ifd0 if entry[1] == _TAG_DATETIME]
+                date_entries += [
+                    entry for entry in cls._ifd_entries(mm, tiff, endian, segment_end, exif_ifd)
+                    if entry[1] in (_TAG_DATETIME_ORIGINAL, _TAG_DATETIME_DIGITIZED)
+                ]
+                for _, tag, value_type, count, value_offset in date_entries:
+                    if tag in offsets or value_type != 2 or count != cls._DATETIME_SIZE:
+                        return None
+
+                    # Only bytes inside the APP1 segment may be written, never scan data
+                    offset = tiff + value_offset
+                    if offset + cls._DATETIME_SIZE > segment_end:
+                        return None
+                    offsets[tag] = offset
+
+                if len(offsets) != 3:
+                    return None
+                return list(offsets.values())
+        except (OSError, ValueError, struct.error):
+            return None
+
     @staticmethod
-    def _open_image(image: Union[ImageFile, str]) -> ImageFile:
-        """Safe image opening helper."""
-        return Image.open(image) if isinstance(image, str) else image
+    def _patch_exif_dates(file_path: str, offsets: List[int], date_bytes: bytes) -> None:
+        """Overwrite existing EXIF date values in place."""
+        value = date_bytes + b"\x00"
+        with open(file_path, "r+b") as f:
+            for offset in offsets:
+                f.seek(offset)
+                f.write(value)
+
+    @classmethod
+    def _find_tiff_header(cls, mm: mmap.mmap) -> Optional[Tuple[int, str, int]]:
+        """Locate the TIFF header of the Exif APP1 segment.
+
+        Walks the segment headers from SOI like piexif does and stops at the first
+        APP1 segment starting with "Exif", so EXIF blocks embedded in other
+        segments (e.g. thumbnails in APP2 or APP13) are never picked up.
+
+        Returns:
+            Optional[Tuple[int, str, int]]: Header offset, struct byte order and end
+            offset of the APP1 segment, or None if not found
+        """
+        if mm[0:2] != b"\xff\xd8":
+            return None
+
+        head = 2
+        while True:
+            marker = mm[head:head + 2]
+            if len(marker) < 2 or marker[0] != 0xff or marker == b"\xff\xda":
+                return None  # No Exif APP1 before the image data
+
+            # The segment length counts its own two bytes, which follow the marker
+            length = struct.unpack_from(">H", mm, head + 2)[0]
+            if length < 2:
+                return None
+            segment_end = head + 2 + length
+            if marker == b"\xff\xe1" and mm[head + 4:head + 8] == b"Exif":
+                break
+            head = segment_end
+
+        tiff = head + 10
+        endian = cls._BYTE_ORDERS.get(mm[tiff:tiff + 2])
+        if endian is None or segment_end > len(mm) or segment_end < tiff + 8:
+            return None
+        return tiff, endian, segment_end
 
     @staticmethod
-    def _parse_datetime(date_str: str, image: Union[ImageFile, str]) -> datetime:
-        """Parse datetime string with validation."""
+    def _ifd_entries(
+            mm: mmap.mmap, tiff: int, endian: str, segment_end: int, ifd_offset: Optional[int] = None
+    ) -> Generator[Tuple[int, int, int, int, int], None, None]:
+        """Iterate over IFD entries, the 0th IFD unless an offset is given.
+
+        Yields:
+            Tuple[int, int, int, int, int]: Entry position, tag, type, count and value offset
+
+        Raises:
+            ValueError: If the IFD does not fit inside the APP1 segment
+        """
+        if ifd_offset is None:
+            ifd_offset = struct.unpack_from(endian + "I", mm, tiff + 4)[0]
+        ifd = tiff + ifd_offset
+        if ifd + 2 > segment_end:
+            raise ValueError("IFD outside APP1 segment")
+        entry_count = struct.unpack_from(endian + "H", mm, ifd)[0]
+        if ifd + 2 + 12 * entry_count > segment_end:
+            raise ValueError("IFD outside APP1 segment")
+        for entry in range(ifd + 2, ifd + 2 + 12 * entry_count, 12):
+            yield entry, *struct.unpack_from(endian + "HHII", mm, entry)
+
+    @classmethod
+    def _parse_datetime(cls, date_str: str, file_path: str) -> datetime:
+        """Parse datetime string with validation.
+
+        The fixed "YYYY:MM:DD HH:MM:SS" layout is sliced directly, strptime
+        is only used for anything else.
+        """
         try:
-            return datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+            # int() tolerates signs and spaces that strptime rejects, so every field must be digits
+            if (len(date_str) == 19 and date_str.isascii() and date_str[10] == " "
+                    and date_str[4] == date_str[7] == date_str[13] == date_str[16] == ":"
+                    and date_str[0:4].isdigit() and date_str[5:7].isdigit() and date_str[8:10].isdigit()
+                    and date_str[11:13].isdigit() and date_str[14:16].isdigit() and date_str[17:19].isdigit()):
+                return datetime(
+                    int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]),
+                    int(date_str[11:13]), int(date_str[14:16]), int(date_str[17:19]),
+                )
+            return datetime.strptime(date_str, cls._DATETIME_FORMAT)
         except ValueError as e:
-            logging.error(f"Invalid date format {date_str} in {image}")
-            raise ValueError(f"Invalid date format in {image}") from e
+            logging.error(f"Invalid date format {date_str} in {file_path}")
+            raise ValueError(f"Invalid date format in {file_path}") from e
 
     @staticmethod
     def _load_exif_data(file_path: str) -> dict:
         """Load existing EXIF data or create new structure."""
-        with Image.open(file_path) as img:
-            try:
-                return piexif.load(img.info["exif"])
-            except (KeyError, ValueError):
-                logging.info(f"Creating new EXIF data for {file_path}")
-                return {"0th": {}, "Exif": {}}
+        try:
+            exif_dict = piexif.load(file_path)
+        except piexif.InvalidImageDataError:
+            raise
+        except (ValueError, struct.error):
+            exif_dict = {}
+        if not exif_dict.get("0th") and not exif_dict.get("Exif"):
+            logging.info(f"Creating new EXIF data for {file_path}")
+            return {"0th": {}, "Exif": {}}
+        return exif_dict
 
     @staticmethod
     def _save_exif_data(file_path: str, exif_dict: dict) -> None:
@@ -6,22 +6,41 @@ Handles batch processing of image files to:
 - Update EXIF data for files beyond threshold date
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Generator, Iterable, Optional, Tuple
+
 from image_utils import EXIFHandler
 
 
 class EXIFProcessor:
     """Main EXIF processing pipeline."""
 
-    def __init__(self, max_date: datetime, change_date: datetime):
+    def __init__(
+            self,
+            max_date: datetime,
+            change_date: datetime,
+            max_workers: Optional[int] = None,
+            skip_old_mtime: bool = False,
+    ):
         """
         Args:
             max_date (datetime): Threshold date for comparison
             change_date (datetime): Date to set for exceeded files
+            max_workers (Optional[int]): Worker threads for directory processing,
+                defaults to 4 per CPU since the work is I/O bound
+            skip_old_mtime (bool): Skip reading EXIF for files modified before max_date.
+                Faster, but misses files whose EXIF date is wrong while mtime is not
         """
         self.max_date = max_date
         self.change_date = change_date
+        self.max_workers = max_workers or (os.cpu_count() or 1) * 4
+        self.skip_old_mtime = skip_old_mtime
+        self._max_timestamp = max_date.timestamp()
         self.exif_handler = EXIFHandler()
+        self._max_date_bytes = self.exif_handler.encode_date(max_date)
+        self._change_date_bytes = self.exif_handler.encode_date(change_date)
 
     def process_directory(self, directory: str) -> None:
         """Process all images in directory.
@@ -29,30 +48,82 @@ class EXIFProcessor:
         Args:
             directory (str): Path to directory with images
         """
-        file_count = 0
-        updated_count = 0
-
-        for file_path in self.exif_handler.find_images(directory):
-            file_count += 1
-            try:
-                if self._needs_update(file_path):
-                    self._update_file(file_path)
-                    updated_count += 1
-            except Exception as e:
-                self._handle_error(file_path, e)
+        # Paths reaching the same file through symlinks or hardlinks are dropped,
+        # so no two workers ever rewrite one file and no locking is needed
+        entries = self._unique_files(self.exif_handler.scan_images(directory))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(self._process_one, entries)
+            # The (0, 0) row keeps the sums defined for an empty directory
+            file_count, updated_count = map(sum, zip((0, 0), *results))
 
         print(f'Processed {file_count} files, updated {updated_count}')
 
-    def _needs_update(self, file_path: str) -> bool:
-        """Check if a file requires date update."""
-        file_date = self.exif_handler.get_image_date(file_path)
-        print(f"Found date {file_date} for {file_path}")
-        return file_date > self.max_date
+    @staticmethod
+    def _unique_files(entries: Iterable[os.DirEntry]) -> Generator[os.DirEntry, None, None]:
+        """Yield each underlying file once, keyed by device and inode.
+
+        Regular files use the inode scandir already returned and the device of
+        their directory, stat'ed once per directory. Only symlinks need a stat
+        of their own, which the entry caches.
+        """
+        seen = set()
+        parent, device = None, None
+        for entry in entries:
+            try:
+                if entry.is_symlink():
+                    st = entry.stat()
+                    key = (st.st_dev, st.st_ino)
+                else:
+                    entry_parent = os.path.dirname(entry.path)
+                    if entry_parent != parent:
+                        parent, device = entry_parent, os.stat(entry_parent).st_dev
+                    key = (device, entry.inode())
+            except OSError:
+                yield entry  # Let the worker report the error
+                continue
+            if key in seen:
+                print(f"Skipping {entry.path}: same file already queued")
+                continue
+            seen.add(key)
+            yield entry
+
+    def _process_one(self, entry: os.DirEntry) -> Tuple[int, int]:
+        """Check and update a single file.
+
+        Returns:
+            Tuple[int, int]: (processed, updated) counts for the file
+        """
+        file_path = entry.path
+        try:
+            needs_update, exif_dict = self._needs_update(entry)
+            if needs_update:
+                self._update_file(file_path, exif_dict)
+                return 1, 1
+        except Exception as e:
+            self._handle_error(file_path, e)
+        return 1, 0
+
+    def _needs_update(self, entry: os.DirEntry) -> Tuple[bool, Optional[dict]]:
+        """Check if a file requires date update.
+
+        Returns:
+            Tuple[bool, Optional[dict]]: Whether to update, and any EXIF data
+            already loaded for the check so the update can reuse it
+        """
+        # entry.stat() is cached, symlinks were already stat'ed by _unique_files
+        if self.skip_old_mtime and entry.stat().st_mtime <= self._max_timestamp:
+            return False, None
+
+        file_path = entry.path
+        # Fixed-width EXIF dates order the same as the datetimes they encode
+        file_date, exif_dict = self.exif_handler.read_date_bytes(file_path)
+        print(f"Found date {file_date.decode('ascii')} for {file_path}")
+        return file_date > self._max_date_bytes, exif_dict
 
-    def _update_file(self, file_path: str) -> None:
+    def _update_file(self, file_path: str, exif_dict: Optional[dict] = None) -> None:
         """Perform EXIF update on file."""
         print(f"Updating {file_path} to {self.change_date}")
-        self.exif_handler.update_exif_date(file_path, self.change_date)
+        self.exif_handler.update_exif_date_bytes(file_path, self._change_date_bytes, exif_dict)
 
     @staticmethod
     def _handle_error(file_path: str, error: Exception) -> None:
@@ -0,0 +1,280 @@
+"""
+Tests for the hand-written EXIF header parsing in image_utils.
+
+JPEGs are built byte by byte so that IFD layout, byte order and
+truncation can be controlled exactly, and results are checked
+against piexif.load.
+"""
+
+import os
+import struct
+import tempfile
+import unittest
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import piexif
+
+from image_utils import EXIFHandler
+
+ASCII = 2
+SHORT = 3
+LONG = 4
+
+DATE = b"2010:01:01 10:00:00\x00"
+
+Entry = Tuple[int, int, int, bytes]
+
+
+def build_tiff(ifd0: List[Entry], exif_ifd: Optional[List[Entry]] = None, byte_order: bytes = b"MM") -> bytes:
+    """Build a TIFF block, keeping IFD entries in the given order.
+
+    Entries are (tag, type, count, value) tuples. Values longer than 4 bytes
+    go to a data area after the IFDs, shorter ones are stored inline.
+    """
+    endian = "<" if byte_order == b"II" else ">"
+    ifd0 = list(ifd0)
+    if exif_ifd is not None:
+        ifd0.append((piexif.ImageIFD.ExifTag, LONG, 1, b""))
+
+    ifd0_size = 2 + 12 * len(ifd0) + 4
+    exif_start = 8 + ifd0_size
+    data_start = exif_start + (2 + 12 * len(exif_ifd) + 4 if exif_ifd is not None else 0)
+    data = b""
+
+    def pack_ifd(entries: List[Entry]) -> bytes:
+        nonlocal data
+        packed = struct.pack(endian + "H", len(entries))
+        for tag, value_type, count, value in entries:
+            if tag == piexif.ImageIFD.ExifTag and not value:
+                value_field = struct.pack(endian + "I", exif_start)
+            elif len(value) <= 4:
+                value_field = value.ljust(4, b"\x00")
+            else:
+                value_field = struct.pack(endian + "I", data_start + len(data))
+                data += value
+            packed += struct.pack(endian + "HHI", tag, value_type, count) + value_field
+        return packed + b"\x00\x00\x00\x00"
+
+    tiff = byte_order + struct.pack(endian + "HI", 42, 8) + pack_ifd(ifd0)
+    if exif_ifd is not None:
+        tiff += pack_ifd(exif_ifd)
+    return tiff + data
+
+
+def app1_segment(tiff: bytes) -> bytes:
+    """Wrap a TIFF block in an Exif APP1 segment."""
+    app1 = b"Exif\x00\x00" + tiff
+    return b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1
+
+
+def build_jpeg(tiff: Optional[bytes]) -> bytes:
+    """Build a minimal JPEG, with an Exif APP1 segment unless tiff is None."""
+    app1 = app1_segment(tiff) if tiff is not None else b""
+    return b"\xff\xd8" + app1 + b"\xff\xda\x00\x02" + b"\x12\x34" * 64 + b"\xff\xd9"
+
+
+def with_leading_segment(jpeg: bytes, marker: bytes, payload: bytes) -> bytes:
+    """Insert a segment right after SOI."""
+    return jpeg[:2] + marker + struct.pack(">H", len(payload) + 2) + payload + jpeg[2:]
+
+
+def embedded_exif(date: bytes) -> bytes:
+    """A complete Exif APP1 segment with all three dates, as found inside e.g. an APP2 thumbnail."""
+    exif_ifd = [(0x9003, ASCII, len(date), date), (0x9004, ASCII, len(date), date)]
+    return app1_segment(build_tiff([(0x0132, ASCII, len(date), date)], exif_ifd))
+
+
+class TempFileTestCase(unittest.TestCase):
+    """Writes test JPEGs to a temporary directory."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def write(self, data: bytes) -> str:
+        path = os.path.join(self._tmp.name, f"{len(os.listdir(self._tmp.name))}.jpg")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+
+class ReadDatetimeFastTest(TempFileTestCase):
+    """_read_datetime_fast must agree with piexif or defer to it."""
+
+    def assert_matches_piexif(self, path: str) -> None:
+        expected = piexif.load(path)["0th"][piexif.ImageIFD.DateTime]
+        self.assertEqual(EXIFHandler._read_datetime_fast(path), expected)
+
+    def test_big_endian(self):
+        path = self.write(build_jpeg(build_tiff([(0x0132, ASCII, len(DATE), DATE)], byte_order=b"MM")))
+        self.assert_matches_piexif(path)
+
+    def test_little_endian(self):
+        path = self.write(build_jpeg(build_tiff([(0x0132, ASCII, len(DATE), DATE)], byte_order=b"II")))
+        self.assert_matches_piexif(path)
+
+    def test_unsorted_ifd(self):
+        for byte_order in (b"MM", b"II"):
+            ifd0 = [(0x8298, ASCII, 4, b"(c)\x00"), (0x0132, ASCII, len(DATE), DATE)]
+            path = self.write(build_jpeg(build_tiff(ifd0, byte_order=byte_order)))
+            self.assert_matches_piexif(path)
+
+    def test_unsorted_ifd_keeps_date(self):
+        ifd0 = [(0x8298, ASCII, 4, b"(c)\x00"), (0x0132, ASCII, len(DATE), DATE)]
+        path = self.write(build_jpeg(build_tiff(ifd0)))
+        file_date, _ = EXIFHandler().read_image_date(path)
+        self.assertEqual(file_date.year, 2010)
+
+    def test_inline_value(self):
+        for byte_order in (b"MM", b"II"):
+            path = self.write(build_jpeg(build_tiff([(0x0132, ASCII, 4, b"abc\x00")], byte_order=byte_order)))
+            self.assert_matches_piexif(path)
+
+    def test_non_ascii_datetime_defers(self):
+        path = self.write(build_jpeg(build_tiff([(0x0132, SHORT, 1, b"\x00\x01")])))
+        self.assertIsNone(EXIFHandler._read_datetime_fast(path))
+
+    def test_missing_datetime_defers(self):
+        path = self.write(build_jpeg(build_tiff([(0x010f, ASCII, 4, b"Cam\x00")])))
+        self.assertIsNone(EXIFHandler._read_datetime_fast(path))
+
+    def test_no_exif_defers(self):
+        path = self.write(build_jpeg(None))
+        self.assertIsNone(EXIFHandler._read_datetime_fast(path))
+
+    def test_truncated_header_defers(self):
+        data = build_jpeg(build_tiff([(0x8298, ASCII, 4, b"(c)\x00"), (0x0132, ASCII, len(DATE), DATE)]))
+        app1_start = data.index(b"Exif")
+        for end in (app1_start + 8, app1_start + 14, app1_start + 20, app1_start + 40):
+            path = self.write(data[:end])
+            self.assertIsNone(EXIFHandler._read_datetime_fast(path))
+
+    def test_exif_embedded_in_other_segment_is_ignored(self):
+        no_exif = build_jpeg(None)
+        for marker in (b"\xff\xe2", b"\xff\xed"):
+            path = self.write(with_leading_segment(no_exif, marker, embedded_exif(DATE)))
+            self.assertEqual(piexif.load(path)["0th"], {})
+            self.assertIsNone(EXIFHandler._read_datetime_fast(path))
+
+    def test_exif_after_other_segment(self):
+        jpeg = build_jpeg(build_tiff([(0x0132, ASCII, len(DATE), DATE)]))
+        path = self.write(with_leading_segment(jpeg, b"\xff\xed", embedded_exif(b"1999:09:09 09:09:09\x00")))
+        self.assert_matches_piexif(path)
+
+    def test_missing_soi_defers(self):
+        jpeg = build_jpeg(build_tiff([(0x0132, ASCII, len(DATE), DATE)]))
+        self.assertIsNone(EXIFHandler._read_datetime_fast(self.write(b"\x00\x00" + jpeg[2:])))
+
+    def test_empty_file_defers(self):
+        self.assertIsNone(EXIFHandler._read_datetime_fast(self.write(b"")))
+
+
+class PatchExifDatesTest(TempFileTestCase):
+    """In-place date patching must only touch the three date values."""
+
+    NEW_DATE = datetime(2025, 1, 1)
+    NEW_DATE_BYTES = b"2025:01:01 00:00:00"
+
+    def build(self, byte_order: bytes = b"MM", exif_ifd: Optional[List[Entry]] = None) -> bytes:
+        if exif_ifd is None:
+            exif_ifd = [(0x9003, ASCII, len(DATE), DATE), (0x9004, ASCII, len(DATE), DATE)]
+        ifd0 = [(0x8298, ASCII, 4, b"(c)\x00"), (0x0132, ASCII, len(DATE), DATE)]
+        return build_jpeg(build_tiff(ifd0, exif_ifd, byte_order))
+
+    def assert_dates(self, path: str, expected: bytes) -> None:
+        exif_dict = piexif.load(path)
+        self.assertEqual(exif_dict["0th"][piexif.ImageIFD.DateTime], expected)
+        self.assertEqual(exif_dict["Exif"][piexif.ExifIFD.DateTimeOriginal], expected)
+        self.assertEqual(exif_dict["Exif"][piexif.ExifIFD.DateTimeDigitized], expected)
+
+    def test_patch_in_place(self):
+        for byte_order in (b"MM", b"II"):
+            original = self.build(byte_order)
+            path = self.write(original)
+            offsets = EXIFHandler._find_date_offsets(path)
+            self.assertEqual(len(offsets), 3)
+
+            EXIFHandler().update_exif_date(path, self.NEW_DATE)
+
+            with open(path, "rb") as f:
+                patched = f.read()
+            self.assertEqual(len(patched), len(original))
+            changed = {i for i, (a, b) in enumerate(zip(original, patched)) if a != b}
+            allowed = {offset + i for offset in offsets for i in range(len(self.NEW_DATE_BYTES))}
+            self.assertTrue(changed)
+            self.assertLessEqual(changed, allowed)
+            self.assert_dates(path, self.NEW_DATE_BYTES)
+
+    def test_missing_tag_falls_back_to_insert(self):
+        path = self.write(self.build(exif_ifd=[(0x9003, ASCII, len(DATE), DATE)]))
+        self.assertIsNone(EXIFHandler._find_date_offsets(path))
+
+        EXIFHandler().update_exif_date(path, self.NEW_DATE)
+        self.assert_dates(path, self.NEW_DATE_BYTES)
+
+    def test_offset_outside_app1_is_not_patched(self):
+        data = self.build()
+        tiff = data.index(b"Exif\x00\x00") + 6
+        scan = data.index(b"\xff\xda")
+        entry = data.index(struct.pack(">HHI", 0x9003, ASCII, len(DATE)))
+        data = data[:entry + 8] + struct.pack(">I", scan + 4 - tiff) + data[entry + 12:]
+        path = self.write(data)
+        self.assertIsNone(EXIFHandler._find_date_offsets(path))
+
+        try:
+            EXIFHandler().update_exif_date(path, self.NEW_DATE)
+        except RuntimeError:
+            pass  # piexif may reject the file, which is fine as long as nothing was patched
+        with open(path, "rb") as f:
+            patched = f.read()
+        self.assertEqual(patched[patched.index(b"\xff\xda"):], data[scan:])
+
+    def test_embedded_exif_is_not_patched(self):
+        thumbnail = embedded_exif(DATE)
+        no_exif = build_jpeg(None)
+        path = self.write(with_leading_segment(no_exif, b"\xff\xe2", thumbnail))
+        self.assertIsNone(EXIFHandler._find_date_offsets(path))
+
+        EXIFHandler().update_exif_date(path, self.NEW_DATE)
+        with open(path, "rb") as f:
+            self.assertIn(thumbnail, f.read())
+        self.assert_dates(path, self.NEW_DATE_BYTES)
+
+    def test_truncated_segment_is_not_patched(self):
+        data = self.build()
+        path = self.write(data[:data.index(b"\xff\xda") - 10])
+        self.assertIsNone(EXIFHandler._find_date_offsets(path))
+
+
+class ReadDateBytesTest(TempFileTestCase):
+    """read_date_bytes must only skip validation for real dates."""
+
+    def read(self, date_bytes: bytes) -> bytes:
+        value = date_bytes + b"\x00"
+        path = self.write(build_jpeg(build_tiff([(0x0132, ASCII, len(value), value)])))
+        return EXIFHandler().read_date_bytes(path)[0]
+
+    def test_valid_dates_pass_through(self):
+        for date_bytes in (b"2010:01:01 10:00:00", b"2024:02:29 23:59:59", b"2023:12:31 00:00:00"):
+            self.assertEqual(self.read(date_bytes), date_bytes)
+
+    def test_early_years_stay_fixed_width(self):
+        # Day 31 takes the re-encoding path, which must keep the year zero-padded
+        self.assertEqual(self.read(b"0500:01:31 10:00:00"), b"0500:01:31 10:00:00")
+        self.assertEqual(self.read(b"0500:01:01 24:00:00"), b"0500:01:01 00:00:00")
+        self.assertEqual(EXIFHandler.encode_date(datetime(500, 1, 31, 10)), b"0500:01:31 10:00:00")
+
+    def test_invalid_hour_is_corrected(self):
+        self.assertEqual(self.read(b"2026:03:04 24:06:07"), b"2026:03:04 00:06:07")
+        self.assertEqual(self.read(b"2024:01:01 1 :00:00"), b"2024:01:01 00:00:00")
+
+    def test_invalid_dates_raise(self):
+        for date_bytes in (b"2026:13:01 10:00:00", b"2023:02:29 10:00:00", b"2024:02:30 10:00:00",
+                           b"2024:00:10 10:00:00", b"2024:01:01 10:60:00", b"2024:01:+1 10:00:00"):
+            with self.assertRaises(ValueError, msg=date_bytes):
+                self.read(date_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
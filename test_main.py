@@ -0,0 +1,119 @@
+"""
+Tests for the directory pipeline in main.
+
+Runs EXIFProcessor over small temporary trees and checks the printed
+summary and the resulting EXIF dates.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import piexif
+
+from image_utils import EXIFHandler
+from main import EXIFProcessor
+from test_image_utils import ASCII, build_jpeg, build_tiff
+
+NEW_DATE = b"2026:03:04 05:06:07\x00"
+OLD_DATE = b"2010:01:01 10:00:00\x00"
+
+
+def jpeg_with_date(date: bytes) -> bytes:
+    """Build a JPEG carrying the date in all three date tags."""
+    exif_ifd = [(0x9003, ASCII, len(date), date), (0x9004, ASCII, len(date), date)]
+    return build_jpeg(build_tiff([(0x0132, ASCII, len(date), date)], exif_ifd))
+
+
+class EXIFProcessorTest(unittest.TestCase):
+    """process_directory must visit each file once and count results correctly."""
+
+    MAX_DATE = datetime(2025, 1, 1, 1, 1, 1)
+    CHANGE_DATE = datetime(2025, 1, 1)
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = self._tmp.name
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def run_processor(self, **kwargs) -> str:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            EXIFProcessor(self.MAX_DATE, self.CHANGE_DATE, **kwargs).process_directory(self.root)
+        return output.getvalue()
+
+    def date_of(self, path: str) -> bytes:
+        return piexif.load(path)["0th"][piexif.ImageIFD.DateTime]
+
+    def test_empty_directory(self):
+        self.assertIn("Processed 0 files, updated 0", self.run_processor())
+
+    def test_counts_updates_and_errors(self):
+        new = self.write("new.jpg", jpeg_with_date(NEW_DATE))
+        old = self.write("sub/old.JPG", jpeg_with_date(OLD_DATE))
+        self.write("sub/broken.jpeg", b"not a jpeg")
+        self.write("sub/notes.txt", b"ignored")
+
+        output = self.run_processor()
+
+        self.assertIn("Processed 3 files, updated 1", output)
+        self.assertIn("Error processing", output)
+        self.assertEqual(self.date_of(new), b"2025:01:01 00:00:00")
+        self.assertEqual(self.date_of(old), OLD_DATE[:-1])
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "symlinks not supported")
+    def test_symlink_and_hardlink_are_processed_once(self):
+        new = self.write("new.jpg", jpeg_with_date(NEW_DATE))
+        old = self.write("old.jpg", jpeg_with_date(OLD_DATE))
+        os.makedirs(os.path.join(self.root, "links"))
+        os.symlink(new, os.path.join(self.root, "links", "link.jpg"))
+        os.link(old, os.path.join(self.root, "links", "hard.jpg"))
+
+        output = self.run_processor()
+
+        self.assertIn("Processed 2 files, updated 1", output)
+        self.assertEqual(output.count("same file already queued"), 2)
+        self.assertEqual(self.date_of(new), b"2025:01:01 00:00:00")
+
+    def test_early_year_is_not_updated(self):
+        early = self.write("early.jpg", jpeg_with_date(b"0500:01:31 10:00:00\x00"))
+
+        output = self.run_processor()
+
+        self.assertIn("Processed 1 files, updated 0", output)
+        self.assertEqual(self.date_of(early), b"0500:01:31 10:00:00")
+
+    def test_skip_old_mtime_does_not_read_exif(self):
+        stale = self.write("stale.jpg", jpeg_with_date(NEW_DATE))
+        old_timestamp = datetime(2020, 1, 1).timestamp()
+        os.utime(stale, (old_timestamp, old_timestamp))
+
+        with mock.patch.object(EXIFHandler, "read_date_bytes") as read_date_bytes:
+            output = self.run_processor(skip_old_mtime=True)
+
+        read_date_bytes.assert_not_called()
+        self.assertIn("Processed 1 files, updated 0", output)
+        self.assertEqual(self.date_of(stale), NEW_DATE[:-1])
+
+    def test_skip_old_mtime_checks_recent_files(self):
+        recent = self.write("recent.jpg", jpeg_with_date(NEW_DATE))
+
+        output = self.run_processor(skip_old_mtime=True)
+
+        self.assertIn("Processed 1 files, updated 1", output)
+        self.assertEqual(self.date_of(recent), b"2025:01:01 00:00:00")
+
+
+if __name__ == '__main__':
+    unittest.main()